@@ -75,6 +75,7 @@ export interface MicroResult {
 export interface SolveResponse {
 	status: string;
 	ingredients: SolvedIngredient[];
+	total_grams: number;
 	meal_calories_kcal: number;
 	meal_protein_g: number;
 	meal_fat_g: number;
@@ -83,13 +84,14 @@ export interface SolveResponse {
 	micros: Record<string, MicroResult>;
 }
 
-// USDA nutrient ID → macro field extraction (prefer Atwater General for calories)
-const MACRO_USDA_IDS: Record<string, number[]> = {
-	calories_kcal: [2047, 1008],
-	protein_g: [1003],
-	fat_g: [1004],
-	carbs_g: [1005],
-	fiber_g: [1079],
+// USDA nutrient ID → macro field extraction (prefer Atwater General for calories).
+// IDs are kept as strings to index RawFood.nutrients without conversion.
+const MACRO_USDA_IDS: Record<string, string[]> = {
+	calories_kcal: ['2047', '1008'],
+	protein_g: ['1003'],
+	fat_g: ['1004'],
+	carbs_g: ['1005'],
+	fiber_g: ['1079'],
 };
 
 // USDA nutrient ID → canonical micro key
@@ -116,9 +118,13 @@ const USDA_ID_TO_MICRO: Record<number, string> = {
 	1185: 'vitamin_k_mcg',
 };
 
-function extractMacro(nutrients: Record<string, number>, usdaIds: number[]): number {
+// Same mapping as [nutrient-ID string, micro key] pairs, matching the
+// string keys of RawFood.nutrients so lookups need no Number() per entry
+const MICRO_ID_ENTRIES = Object.entries(USDA_ID_TO_MICRO);
+
+function extractMacro(nutrients: Record<string, number>, usdaIds: string[]): number {
 	for (const id of usdaIds) {
-		const val = nutrients[String(id)];
+		const val = nutrients[id];
 		if (val !== undefined) return val;
 	}
 	return 0;
@@ -127,9 +133,10 @@ function extractMacro(nutrients: Record<string, number>, usdaIds: number[]): num
 function transformFood(entry: RawFood): Food {
 	const n = entry.nutrients;
 	const micros: Record<string, number> = {};
-	for (const [uid, amount] of Object.entries(n)) {
-		const key = USDA_ID_TO_MICRO[Number(uid)];
-		if (key) micros[key] = amount;
+	// Probe only the 20 tracked IDs instead of walking every USDA nutrient
+	for (const [uid, key] of MICRO_ID_ENTRIES) {
+		const amount = n[uid];
+		if (amount !== undefined) micros[key] = amount;
 	}
 	const food: Food = {
 		fdc_id: entry.fdc_id,
@@ -180,6 +187,9 @@ let worker: Worker | null = null;
 let foodsSent = false;
 let messageId = 0;
 let latestRequestId = 0;
+// Most recent answered request. highs-js cannot be warm-started from a prior
+// basis, but an unchanged re-solve can skip the worker round-trip entirely.
+let lastSolve: { input: string; result: SolveResponse } | null = null;
 const pending = new Map<number, {
 	resolve: (r: SolveResponse) => void;
 	reject: (e: Error) => void;
@@ -210,6 +220,8 @@ export function initWorkerFoods(foods: Record<number, Food>) {
 	// JSON round-trip strips Svelte 5 $state proxies
 	w.postMessage({ type: 'init', foods: JSON.parse(JSON.stringify(foods)) });
 	foodsSent = true;
+	// Custom food edits can change nutrients behind an unchanged key
+	lastSolve = null;
 }
 
 export async function solve(
@@ -271,18 +283,21 @@ export async function solve(
 	const w = getWorker();
 	const id = ++messageId;
 	latestRequestId = id;
+	// JSON round-trip strips Svelte 5 $state proxies (e.g. priorities, macro_constraints)
+	const serialized = JSON.stringify(input);
+	if (lastSolve?.input === serialized) return lastSolve.result;
 	return new Promise((resolve, reject) => {
 		pending.set(id, {
 			resolve: (r) => {
 				if (id !== latestRequestId) {
 					reject(new Error('superseded'));
 				} else {
+					lastSolve = { input: serialized, result: r };
 					resolve(r);
 				}
 			},
 			reject,
 		});
-		// JSON round-trip strips Svelte 5 $state proxies (e.g. priorities, macro_constraints)
-		w.postMessage({ type: 'solve', id, input: JSON.parse(JSON.stringify(input)) });
+		w.postMessage({ type: 'solve', id, input: JSON.parse(serialized) });
 	});
 }
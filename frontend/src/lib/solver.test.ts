@@ -32,12 +32,14 @@ const broccoli: Food = {
 	micros: { iron_mg: 0.73, calcium_mg: 47, vitamin_c_mg: 89.2 },
 };
 
+const defaultTargets = { meal_calories_kcal: 500, cal_tolerance: 50 };
+
 describe('buildLpModel', () => {
 	it('generates valid LP with calorie band', () => {
 		const lp = modelToLpString(buildLpModel({
 			ingredients: [{ key: 169756, min_g: 0, max_g: 400 }],
 			foods: { 169756: rice },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 		}));
 		expect(lp).toContain('Minimize');
 		expect(lp).toContain('Subject To');
@@ -54,32 +56,51 @@ describe('buildLpModel', () => {
 				{ key: 170379, min_g: 100, max_g: 300 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 			macro_constraints: [{ nutrient: 'protein', mode: 'gte', grams: 30, hard: true }],
 		}));
 		expect(lp).toMatch(/protein_gte:/);
 	});
 
-	it('includes micro shortfall variables', () => {
+	it('folds micro shortfall into the pct row', () => {
 		const lp = modelToLpString(buildLpModel({
 			ingredients: [
 				{ key: 169756, min_g: 0, max_g: 400 },
 				{ key: 170379, min_g: 100, max_g: 300 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 			micro_targets: { iron_mg: 8.0 },
 		}));
-		expect(lp).toMatch(/iron_mg_short/);
-		expect(lp).toMatch(/iron_mg_pct/);
+		// target * pct + supplied >= target; no separate shortfall column
+		expect(lp).toMatch(/iron_mg_short_c: 8 iron_mg_pct \+ .* >= 8/);
+		expect(lp).not.toMatch(/iron_mg_short(?!_c)/);
 		expect(lp).toMatch(/worst_pct/);
 	});
 
+	it('skips micro objectives when every micro target is zero', () => {
+		const lp = modelToLpString(buildLpModel({
+			ingredients: [
+				{ key: 169756, min_g: 0, max_g: 400 },
+				{ key: 170379, min_g: 100, max_g: 300 },
+			],
+			foods: { 169756: rice, 170379: broccoli },
+			targets: defaultTargets,
+			micro_targets: { iron_mg: 0, calcium_mg: 0 },
+			micro_uls: { iron_mg: 45 },
+		}));
+		expect(lp).not.toMatch(/_short/);
+		expect(lp).not.toMatch(/worst_pct/);
+		expect(lp).not.toMatch(/ul_prox/);
+		// Hard UL caps are independent of micro targets
+		expect(lp).toMatch(/ul_iron_mg:/);
+	});
+
 	it('includes ingredient bounds', () => {
 		const lp = modelToLpString(buildLpModel({
 			ingredients: [{ key: 169756, min_g: 50, max_g: 400 }],
 			foods: { 169756: rice },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 		}));
 		expect(lp).toMatch(/50 <= g_169756 <= 400/);
 	});
@@ -106,7 +127,7 @@ describe('buildLpModel', () => {
 				{ key: -1, min_g: 0, max_g: 200 },
 			],
 			foods: { 169756: rice, [-1]: customFood },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 		}));
 		// Should use g_n1 not g_-1
 		expect(lp).toContain('g_n1');
@@ -122,7 +143,7 @@ describe('buildLpModel', () => {
 				{ key: 170379, min_g: 0, max_g: 300 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 			macro_constraints: [{ nutrient: 'protein', mode: 'gte', grams: 30, hard: false }],
 		}));
 		expect(lp).toMatch(/loose_protein_gte_dev/);
@@ -130,6 +151,25 @@ describe('buildLpModel', () => {
 		expect(lp).toMatch(/worst_loose/);
 	});
 
+	it('bounds soft macro deviations by the reachable range', () => {
+		const lp = modelToLpString(buildLpModel({
+			ingredients: [
+				{ key: 169756, min_g: 0, max_g: 400 },
+				{ key: 170379, min_g: 0, max_g: 300 },
+			],
+			foods: { 169756: rice, 170379: broccoli },
+			targets: defaultTargets,
+			macro_constraints: [
+				{ nutrient: 'protein', mode: 'gte', grams: 30, hard: false },
+				{ nutrient: 'fat', mode: 'lte', grams: 1000, hard: false },
+			],
+		}));
+		// Shortfall can be at most the target when every min_g is zero
+		expect(lp).toContain(' 0 <= loose_protein_gte_dev <= 30');
+		// No gram combination can exceed a 1000 g fat cap
+		expect(lp).toContain(' 0 <= loose_fat_lte_dev <= 0');
+	});
+
 	it('includes UL hard constraints', () => {
 		const lp = modelToLpString(buildLpModel({
 			ingredients: [
@@ -137,7 +177,7 @@ describe('buildLpModel', () => {
 				{ key: 170379, min_g: 0, max_g: 300 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 			micro_uls: { iron_mg: 45 },
 		}));
 		expect(lp).toMatch(/ul_iron_mg:/);
@@ -150,7 +190,7 @@ describe('buildLpModel', () => {
 				{ key: 170379, min_g: 0, max_g: 300 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 			micro_targets: { iron_mg: 8.0 },
 			micro_uls: { iron_mg: 45 },
 		}));
@@ -166,7 +206,7 @@ describe('buildLpModel', () => {
 				{ key: 170379, min_g: 0, max_g: 300 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 			macro_ratio: {
 				carb_pct: 50,
 				protein_pct: 25,
@@ -189,7 +229,7 @@ describe('buildLpModel', () => {
 				{ key: 170379, min_g: 0, max_g: 300 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 			macro_ratio: {
 				carb_pct: 50,
 				protein_pct: 25,
@@ -214,7 +254,7 @@ describe('buildLpModel', () => {
 				{ key: 170379, min_g: 0, max_g: 300 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 			priorities: ['ingredient_diversity', 'total_weight'],
 		}));
 		expect(lp).toMatch(/max_gram/);
@@ -229,7 +269,7 @@ describe('buildLpModel', () => {
 				{ key: 170379, min_g: 0, max_g: 300 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 			micro_targets: { iron_mg: 8.0 },
 			micro_strategy: 'breadth',
 		}));
@@ -242,7 +282,7 @@ describe('buildLpModel', () => {
 		const lp = modelToLpString(buildLpModel({
 			ingredients: [{ key: 169756, min_g: 0, max_g: 400 }],
 			foods: { 169756: rice },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 		}));
 		// rice: 130 kcal/100g = 1.3 kcal/g
 		expect(lp).toMatch(/cal_lo: 1\.3 g_169756 >= 450/);
@@ -258,7 +298,7 @@ describe('solveLocal', () => {
 				{ key: 170379, min_g: 100, max_g: 300 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 		});
 		expect(result.status).toBe('optimal');
 		expect(result.ingredients).toHaveLength(2);
@@ -276,11 +316,38 @@ describe('solveLocal', () => {
 		expect(result.status).toBe('infeasible');
 	});
 
+	it('accepts HiGHS option overrides', async () => {
+		const result = await solveLocal({
+			ingredients: [
+				{ key: 169756, min_g: 0, max_g: 400 },
+				{ key: 170379, min_g: 100, max_g: 300 },
+			],
+			foods: { 169756: rice, 170379: broccoli },
+			targets: defaultTargets,
+			highs_options: { presolve: 'off' },
+		});
+		expect(result.status).toBe('optimal');
+		expect(result.meal_calories_kcal).toBeGreaterThanOrEqual(449);
+		expect(result.meal_calories_kcal).toBeLessThanOrEqual(551);
+	});
+
+	it('returns infeasible when ingredient minimums overshoot the calorie band', async () => {
+		const result = await solveLocal({
+			ingredients: [
+				{ key: 169756, min_g: 1000, max_g: 1200 },
+				{ key: 170379, min_g: 0, max_g: 300 },
+			],
+			foods: { 169756: rice, 170379: broccoli },
+			targets: defaultTargets,
+		});
+		expect(result.status).toBe('infeasible');
+	});
+
 	it('returns infeasible for empty ingredients', async () => {
 		const result = await solveLocal({
 			ingredients: [],
 			foods: {},
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 		});
 		expect(result.status).toBe('infeasible');
 	});
@@ -292,7 +359,7 @@ describe('solveLocal', () => {
 				{ key: 170379, min_g: 100, max_g: 300 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 			sex: 'male',
 			age_group: '19-30',
 			optimize_nutrients: ['iron_mg', 'calcium_mg'],
@@ -325,7 +392,7 @@ describe('solveLocal', () => {
 		const result = await solveLocal({
 			ingredients: [{ key: 169756, min_g: 100, max_g: 400 }],
 			foods: { 169756: rice },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 		});
 		// Should still return micros (using defaults male/19-30)
 		expect(Object.keys(result.micros).length).toBe(20);
@@ -338,15 +405,31 @@ describe('solveLocal', () => {
 				{ key: 170379, min_g: 100, max_g: 500 },
 			],
 			foods: { 169756: rice, 170379: broccoli },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
 			macro_constraints: [
 				{ nutrient: 'protein', mode: 'gte', grams: 10, hard: true },
 			],
+			feasibility_only: true,
 		});
-		expect(result.status).toBe('optimal');
+		expect(result.status).toBe('feasible');
 		expect(result.meal_protein_g).toBeGreaterThanOrEqual(9.5);
 	});
 
+	it('returns infeasible when a hard macro floor is out of reach', async () => {
+		const result = await solveLocal({
+			ingredients: [
+				{ key: 169756, min_g: 0, max_g: 400 },
+				{ key: 170379, min_g: 100, max_g: 500 },
+			],
+			foods: { 169756: rice, 170379: broccoli },
+			targets: defaultTargets,
+			macro_constraints: [
+				{ nutrient: 'protein', mode: 'gte', grams: 500, hard: true },
+			],
+		});
+		expect(result.status).toBe('infeasible');
+	});
+
 	it('solves with custom food (negative fdc_id)', async () => {
 		const customFood: Food = {
 			fdc_id: -1,
@@ -369,9 +452,10 @@ describe('solveLocal', () => {
 				{ key: -1, min_g: 0, max_g: 200 },
 			],
 			foods: { 169756: rice, [-1]: customFood },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
+			feasibility_only: true,
 		});
-		expect(result.status).toBe('optimal');
+		expect(result.status).toBe('feasible');
 		expect(result.ingredients).toHaveLength(2);
 		expect(result.meal_calories_kcal).toBeGreaterThanOrEqual(449);
 		expect(result.meal_calories_kcal).toBeLessThanOrEqual(551);
@@ -414,9 +498,10 @@ describe('solveLocal', () => {
 				{ key: -2, min_g: 0, max_g: 500 },
 			],
 			foods: { [-1]: bar, [-2]: shake },
-			targets: { meal_calories_kcal: 500, cal_tolerance: 50 },
+			targets: defaultTargets,
+			feasibility_only: true,
 		});
-		expect(result.status).toBe('optimal');
+		expect(result.status).toBe('feasible');
 		expect(result.ingredients).toHaveLength(2);
 	});
 });
@@ -34,8 +34,28 @@ export interface LpModelInput {
 	age_group?: string;
 	optimize_nutrients?: string[];
 	pinned_micros?: Record<string, number>;
+	highs_options?: HighsSolveOptions;
+	/**
+	 * Stop after the first lex pass; for callers that only need a feasible
+	 * point. The result reports status 'feasible': lower priority tiers are
+	 * never optimized, so grams and totals are not lex-optimal.
+	 */
+	feasibility_only?: boolean;
 }
 
+type HighsSolveOptions = Parameters<Awaited<ReturnType<typeof highsLoader>>['solve']>[1];
+
+/**
+ * HiGHS defaults for every lex pass. The model is a pure continuous LP, so
+ * pin the simplex solver instead of letting HiGHS choose between simplex and
+ * IPM on each pass. The seed is HiGHS's own default, spelled out so repeated
+ * solves stay reproducible. Callers can override any option via `highs_options`.
+ */
+const DEFAULT_HIGHS_OPTIONS: HighsSolveOptions = {
+	solver: 'simplex',
+	random_seed: 0,
+};
+
 // Priority constants matching Python solver
 const PRIORITY_MICROS = 'micros';
 const PRIORITY_MACRO_RATIO = 'macro_ratio';
@@ -48,15 +68,29 @@ const DEFAULT_PRIORITIES = [
 	PRIORITY_TOTAL_WEIGHT,
 ];
 
+/**
+ * Formatted fractional values. The same per-gram coefficients recur across
+ * rows, models and lex passes; the cap keeps a long session bounded.
+ */
+const fmtCache = new Map<number, string>();
+const FMT_CACHE_MAX = 4096;
+
 /** Format a number for LP output, avoiding -0 and unnecessary precision. */
 function fmt(n: number): string {
 	if (Math.abs(n) < 1e-12) return '0';
+	// Integral values (gram bounds, most targets) print exactly as-is,
+	// skipping the toPrecision + regex round-trip below.
+	if (Number.isInteger(n) && Math.abs(n) < 1e10) return String(n);
+	const cached = fmtCache.get(n);
+	if (cached !== undefined) return cached;
 	// Use enough precision to not lose nutritional data
-	const s = n.toPrecision(10);
+	let s = n.toPrecision(10);
 	// Strip trailing zeros after decimal point
 	if (s.includes('.')) {
-		return s.replace(/\.?0+$/, '');
+		s = s.replace(/\.?0+$/, '');
 	}
+	if (fmtCache.size >= FMT_CACHE_MAX) fmtCache.clear();
+	fmtCache.set(n, s);
 	return s;
 }
 
@@ -97,6 +131,8 @@ function sanitize(key: string): string {
 
 export interface LpModelComponents {
 	ingredients: LpModelInput['ingredients'];
+	/** LP column name per ingredient, aligned with `ingredients` by index. */
+	gramVars: string[];
 	constraints: string[];
 	bounds: string[];
 	lexLevels: { varName: string; maxVal: number }[][];
@@ -134,50 +170,65 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 		auxVars.add(varName);
 	}
 
+	// Minimax: `name` sits above every var, so minimizing it minimizes the
+	// largest. LP has no max-equality row, so this costs one row per var.
+	function addMinimax(name: string, vars: string[], ub: number) {
+		addBound(0, name, ub);
+		for (const v of vars) {
+			constraints.push(` ${name}_${v}: ${name} - ${v} >= 0`);
+		}
+	}
+
 	function addLowerBound(varName: string, lb: number = 0) {
 		bounds.push(` ${varName} >= ${fmt(lb)}`);
 		auxVars.add(varName);
 	}
 
 	// ── Decision variables ──────────────────────────────────────────
-	for (const ing of ingredients) {
-		addBound(ing.min_g, gVar(ing.key), ing.max_g);
+	// Column names are built once and indexed by ingredient position below
+	const gramVars = ingredients.map((ing) => gVar(ing.key));
+	ingredients.forEach((ing, i) => addBound(ing.min_g, gramVars[i], ing.max_g));
+
+	// Precompute per-gram coefficients (natural units, no scaling), stored
+	// densely by ingredient position alongside gramVars
+	const n = ingredients.length;
+	const calPerG = new Float64Array(n);
+	const proPerG = new Float64Array(n);
+	const fatPerG = new Float64Array(n);
+	const carbPerG = new Float64Array(n);
+	const fibPerG = new Float64Array(n);
+
+	for (let i = 0; i < n; i++) {
+		const f = foods[ingredients[i].key];
+		calPerG[i] = f.calories_kcal_per_100g / 100;
+		proPerG[i] = f.protein_g_per_100g / 100;
+		fatPerG[i] = f.fat_g_per_100g / 100;
+		carbPerG[i] = f.carbs_g_per_100g / 100;
+		fibPerG[i] = f.fiber_g_per_100g / 100;
 	}
 
-	// Precompute per-gram coefficients (natural units, no scaling)
-	const calPerG: Record<number, number> = {};
-	const proPerG: Record<number, number> = {};
-	const fatPerG: Record<number, number> = {};
-	const carbPerG: Record<number, number> = {};
-	const fibPerG: Record<number, number> = {};
-
-	for (const ing of ingredients) {
-		const f = foods[ing.key];
-		calPerG[ing.key] = f.calories_kcal_per_100g / 100;
-		proPerG[ing.key] = f.protein_g_per_100g / 100;
-		fatPerG[ing.key] = f.fat_g_per_100g / 100;
-		carbPerG[ing.key] = f.carbs_g_per_100g / 100;
-		fibPerG[ing.key] = f.fiber_g_per_100g / 100;
-	}
-
-	const macroCoeffMap: Record<string, Record<number, number>> = {
+	const macroCoeffMap: Record<string, Float64Array> = {
 		carbs: carbPerG,
 		protein: proPerG,
 		fat: fatPerG,
 		fiber: fibPerG,
 	};
 
-	// Helper to build sum expression terms for a coefficient map
-	function nutrientTerms(coeffs: Record<number, number>): [number, string][] {
-		return ingredients.map((ing) => [coeffs[ing.key], gVar(ing.key)]);
+	// Helper to build sum expression terms for a coefficient map. `scale`
+	// multiplies every coefficient in the same pass, so negated or
+	// unit-converted sums need no second map over the terms.
+	function nutrientTerms(coeffs: Float64Array, scale = 1): [number, string][] {
+		return gramVars.map((g, i) => [coeffs[i] * scale, g]);
 	}
 
 	// ── Calorie band ────────────────────────────────────────────────
 	const calLo = targets.meal_calories_kcal - targets.cal_tolerance;
 	const calHi = targets.meal_calories_kcal + targets.cal_tolerance;
 
-	constraints.push(` cal_lo: ${buildExpr(nutrientTerms(calPerG))} >= ${fmt(calLo)}`);
-	constraints.push(` cal_hi: ${buildExpr(nutrientTerms(calPerG))} <= ${fmt(calHi)}`);
+	// Build the calorie sum once; both sides of the band share it
+	const calExpr = buildExpr(nutrientTerms(calPerG));
+	constraints.push(` cal_lo: ${calExpr} >= ${fmt(calLo)}`);
+	constraints.push(` cal_hi: ${calExpr} <= ${fmt(calHi)}`);
 
 	// ── Macro constraints ───────────────────────────────────────────
 	const looseDevVars: string[] = [];
@@ -191,40 +242,46 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 			const target = mc.grams;
 
 			if (mc.hard) {
+				const expr = buildExpr(terms);
 				if (mc.mode === 'gte') {
-					constraints.push(` ${mc.nutrient}_gte: ${buildExpr(terms)} >= ${fmt(target)}`);
+					constraints.push(` ${mc.nutrient}_gte: ${expr} >= ${fmt(target)}`);
 				} else if (mc.mode === 'lte') {
-					constraints.push(` ${mc.nutrient}_lte: ${buildExpr(terms)} <= ${fmt(target)}`);
+					constraints.push(` ${mc.nutrient}_lte: ${expr} <= ${fmt(target)}`);
 				} else if (mc.mode === 'eq') {
-					constraints.push(` ${mc.nutrient}_eq_lo: ${buildExpr(terms)} >= ${fmt(target)}`);
-					constraints.push(` ${mc.nutrient}_eq_hi: ${buildExpr(terms)} <= ${fmt(target)}`);
+					constraints.push(` ${mc.nutrient}_eq_lo: ${expr} >= ${fmt(target)}`);
+					constraints.push(` ${mc.nutrient}_eq_hi: ${expr} <= ${fmt(target)}`);
 				}
 			} else {
 				// Soft / loose constraint
 				const name = `loose_${mc.nutrient}_${mc.mode}`;
-				const maxPossible = ingredients.reduce(
-					(s, ing) => s + ing.max_g * coeffs[ing.key],
-					0
-				);
-				const devBound = Math.max(maxPossible, target);
+				let minPossible = 0;
+				let maxPossible = 0;
+				for (let i = 0; i < n; i++) {
+					minPossible += ingredients[i].min_g * coeffs[i];
+					maxPossible += ingredients[i].max_g * coeffs[i];
+				}
+				// Column bounds only need to cover the deviation the gram box can
+				// actually realize on each side of the target
+				const overBound = Math.max(0, maxPossible - target);
+				const underBound = Math.max(0, target - minPossible);
 
 				if (mc.mode === 'gte') {
 					// dev >= target - actual => dev + actual >= target
 					// Rewrite: dev + sum(coeff * g) >= target
 					const devTerms: [number, string][] = [[1, `${name}_dev`], ...terms];
 					constraints.push(` ${name}_c: ${buildExpr(devTerms)} >= ${fmt(target)}`);
-					addBound(0, `${name}_dev`, devBound);
+					addBound(0, `${name}_dev`, underBound);
 				} else if (mc.mode === 'lte') {
 					// dev >= actual - target => dev - sum(coeff * g) >= -target
 					// Rewrite: dev - actual >= -target
 					const devTerms: [number, string][] = [
 						[1, `${name}_dev`],
-						...terms.map(([c, v]) => [-c, v] as [number, string]),
+						...nutrientTerms(coeffs, -1),
 					];
 					constraints.push(
 						` ${name}_c: ${buildExpr(devTerms)} >= ${fmt(-target)}`
 					);
-					addBound(0, `${name}_dev`, devBound);
+					addBound(0, `${name}_dev`, overBound);
 				} else if (mc.mode === 'eq') {
 					// Absolute value via pos/neg split:
 					// actual - target = pos - neg, dev = pos + neg
@@ -239,17 +296,21 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 					constraints.push(
 						` ${name}_abs: ${name}_dev - ${name}_pos - ${name}_neg = 0`
 					);
-					addBound(0, `${name}_pos`, devBound);
-					addBound(0, `${name}_neg`, devBound);
-					addBound(0, `${name}_dev`, devBound);
+					addBound(0, `${name}_pos`, overBound);
+					addBound(0, `${name}_neg`, underBound);
+					addBound(0, `${name}_dev`, Math.max(overBound, underBound));
 				}
 
 				// Normalize deviation to percentage [0, 1]
 				// pct_dev >= dev / normalizer
 				// => pct_dev * normalizer >= dev  (keep linear)
 				// => pct_dev * normalizer - dev >= 0
+				// The normalizer keeps its original scale so tighter column
+				// bounds do not change how deviations are weighed.
 				const normDenom =
-					mc.mode === 'gte' ? Math.max(target, 1e-9) : Math.max(devBound, 1e-9);
+					mc.mode === 'gte'
+						? Math.max(target, 1e-9)
+						: Math.max(maxPossible, target, 1e-9);
 				constraints.push(
 					` ${name}_pct_c: ${fmt(normDenom)} ${name}_pct - ${name}_dev >= 0`
 				);
@@ -266,24 +327,31 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 	let maxWorstLoose = 0;
 
 	if (looseDevVars.length > 0) {
-		addBound(0, 'worst_loose', maxLooseDev);
-		for (const dv of looseDevVars) {
-			constraints.push(` worst_loose_${dv}: worst_loose - ${dv} >= 0`);
-		}
+		addMinimax('worst_loose', looseDevVars, maxLooseDev);
 		hasWorstLoose = true;
 		maxWorstLoose = maxLooseDev;
 	}
 
 	// ── UL hard constraints ─────────────────────────────────────────
-	// Helper to get micro per-gram coefficient
-	function microPerG(foodObj: Food, key: string): number {
-		return (foodObj.micros[key] ?? 0) / 100;
+	// Sparse per-gram micro coefficients: nutrient key -> [ingredient index,
+	// per-gram amount] for the foods that actually contain it. One pass over
+	// each food's micros replaces a scan of every ingredient per nutrient.
+	const microCoeffs = new Map<string, [number, number][]>();
+	for (let i = 0; i < n; i++) {
+		for (const [key, per100] of Object.entries(foods[ingredients[i].key].micros)) {
+			const perG = per100 / 100;
+			if (Math.abs(perG) <= 1e-12) continue;
+			let entries = microCoeffs.get(key);
+			if (!entries) {
+				entries = [];
+				microCoeffs.set(key, entries);
+			}
+			entries.push([i, perG]);
+		}
 	}
 
-	function microTerms(key: string): [number, string][] {
-		return ingredients
-			.map((ing) => [microPerG(foods[ing.key], key), gVar(ing.key)] as [number, string])
-			.filter(([c]) => Math.abs(c) > 1e-12);
+	function microTerms(key: string, scale = 1): [number, string][] {
+		return (microCoeffs.get(key) ?? []).map(([i, c]) => [c * scale, gramVars[i]]);
 	}
 
 	if (micro_uls) {
@@ -298,28 +366,25 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 	}
 
 	// ── Micronutrient minimax objective ──────────────────────────────
+	// Only positive targets take part; filtering once here lets the minimax,
+	// depth and UL-proximity blocks skip entirely when nothing is optimized.
+	const activeMicroTargets = Object.entries(micro_targets ?? {}).filter(([, v]) => v > 0);
+
 	let hasWorstPct = false;
 	let maxWorstPct = 0;
 	const pctShortVars: string[] = [];
 
-	if (micro_targets) {
-		for (const [key, targetVal] of Object.entries(micro_targets)) {
-			if (targetVal <= 0) continue;
+	if (activeMicroTargets.length > 0) {
+		for (const [key, targetVal] of activeMicroTargets) {
 			const terms = microTerms(key);
 			const sKey = sanitize(key);
 
-			// shortfall >= target - sum(per_g * g), shortfall >= 0
-			// => shortfall + sum(per_g * g) >= target
-			const shortTerms: [number, string][] = [[1, `${sKey}_short`], ...terms];
+			// pct_short >= shortfall / target, shortfall = target - sum(per_g * g)
+			// The target is constant, so fold it into the coefficient instead
+			// of carrying a separate shortfall column:
+			// => pct_short * target + sum(per_g * g) >= target
+			const shortTerms: [number, string][] = [[targetVal, `${sKey}_pct`], ...terms];
 			constraints.push(` ${sKey}_short_c: ${buildExpr(shortTerms)} >= ${fmt(targetVal)}`);
-			addBound(0, `${sKey}_short`, targetVal);
-
-			// pct_short >= shortfall / target
-			// => pct_short * target >= shortfall
-			// => pct_short * target - shortfall >= 0
-			constraints.push(
-				` ${sKey}_pct_c: ${fmt(targetVal)} ${sKey}_pct - ${sKey}_short >= 0`
-			);
 			addBound(0, `${sKey}_pct`, 1);
 
 			pctShortVars.push(`${sKey}_pct`);
@@ -327,10 +392,7 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 
 		if (pctShortVars.length > 0) {
 			// worst_pct >= each pct_short
-			addBound(0, 'worst_pct', 1);
-			for (const ps of pctShortVars) {
-				constraints.push(` worst_pct_${ps}: worst_pct - ${ps} >= 0`);
-			}
+			addMinimax('worst_pct', pctShortVars, 1);
 			hasWorstPct = true;
 			maxWorstPct = 1;
 		}
@@ -360,17 +422,15 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 	let hasDepthWorstPct = false;
 	let maxDepthWorstPct = 0;
 
-	if (pctShortVars.length > 0 && micro_strategy === 'depth' && micro_targets) {
+	if (pctShortVars.length > 0 && micro_strategy === 'depth') {
 		const depthPctVars: string[] = [];
 
-		for (const [key, targetVal] of Object.entries(micro_targets)) {
-			if (targetVal <= 0) continue;
+		for (const [key, targetVal] of activeMicroTargets) {
 			const sKey = sanitize(key);
 			// Compute max achievable nutrient from all ingredients at max_g
 			let maxAchievable = 0;
-			for (const ing of ingredients) {
-				const food = foods[ing.key];
-				maxAchievable += ing.max_g * microPerG(food, key);
+			for (const [i, c] of microCoeffs.get(key) ?? []) {
+				maxAchievable += ingredients[i].max_g * c;
 			}
 			const maxCoverage = maxAchievable / targetVal;
 			// Only include in depth minimax if >50% coverage is possible
@@ -380,10 +440,7 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 		}
 
 		if (depthPctVars.length > 0) {
-			addBound(0, 'depth_worst_pct', 1);
-			for (const ps of depthPctVars) {
-				constraints.push(` depth_worst_pct_${ps}: depth_worst_pct - ${ps} >= 0`);
-			}
+			addMinimax('depth_worst_pct', depthPctVars, 1);
 			hasDepthWorstPct = true;
 			maxDepthWorstPct = 1;
 		}
@@ -393,22 +450,21 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 	let hasWorstUlProx = false;
 	let maxWorstUlProx = 0;
 
-	if (micro_targets && micro_uls) {
+	if (activeMicroTargets.length > 0 && micro_uls) {
 		const ulProxVars: string[] = [];
 
-		for (const [key, targetVal] of Object.entries(micro_targets)) {
+		for (const [key, targetVal] of activeMicroTargets) {
 			const ulVal = micro_uls[key];
 			if (ulVal === undefined) continue;
 			const headroom = ulVal - targetVal;
 			if (headroom <= 0) continue;
 			const sKey = sanitize(key);
-			const terms = microTerms(key);
 
 			// excess >= total - target, excess >= 0
 			// => excess - sum(per_g * g) >= -target
 			const excessTerms: [number, string][] = [
 				[1, `${sKey}_ul_excess`],
-				...terms.map(([c, v]) => [-c, v] as [number, string]),
+				...microTerms(key, -1),
 			];
 			constraints.push(
 				` ${sKey}_ul_excess_c: ${buildExpr(excessTerms)} >= ${fmt(-targetVal)}`
@@ -426,10 +482,7 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 		}
 
 		if (ulProxVars.length > 0) {
-			addBound(0, 'worst_ul_prox', 1);
-			for (const up of ulProxVars) {
-				constraints.push(` worst_ul_prox_${up}: worst_ul_prox - ${up} >= 0`);
-			}
+			addMinimax('worst_ul_prox', ulProxVars, 1);
 			hasWorstUlProx = true;
 			maxWorstUlProx = 1;
 		}
@@ -456,80 +509,57 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 			}
 		}
 
-		const macroEntries: { name: string; nutrient: string; calCoeffs: Record<number, number>; pinnedCal: number; targetPct: number }[] = [
+		// Gram coefficients are scaled to kcal (4/4/9) when the terms are built
+		const macroEntries: { name: string; nutrient: string; perG: Float64Array; kcalPerG: number; pinnedCal: number; targetPct: number }[] = [
 			{
 				name: 'carb',
 				nutrient: 'carbs',
-				calCoeffs: Object.fromEntries(ingredients.map((ing) => [ing.key, carbPerG[ing.key] * 4])),
+				perG: carbPerG,
+				kcalPerG: 4,
 				pinnedCal: pinnedCarbCal,
 				targetPct: macro_ratio.carb_pct,
 			},
 			{
 				name: 'pro',
 				nutrient: 'protein',
-				calCoeffs: Object.fromEntries(ingredients.map((ing) => [ing.key, proPerG[ing.key] * 4])),
+				perG: proPerG,
+				kcalPerG: 4,
 				pinnedCal: pinnedProCal,
 				targetPct: macro_ratio.protein_pct,
 			},
 			{
 				name: 'fat',
 				nutrient: 'fat',
-				calCoeffs: Object.fromEntries(ingredients.map((ing) => [ing.key, fatPerG[ing.key] * 9])),
+				perG: fatPerG,
+				kcalPerG: 9,
 				pinnedCal: pinnedFatCal,
 				targetPct: macro_ratio.fat_pct,
 			},
 		];
 
+		// Same for every entry: deviation bound from all macros at max grams
+		const maxMealCal = ingredients.reduce(
+			(s, ing, i) => s + ing.max_g * (carbPerG[i] * 4 + proPerG[i] * 4 + fatPerG[i] * 9),
+			0
+		);
+		const bound = (maxMealCal + pinnedCal) * 100;
+
 		const macroDevVars: string[] = [];
 
 		for (const entry of macroEntries) {
 			if (ratioExcluded.has(entry.nutrient)) continue;
 
-			// day_X_cal = sum(calCoeff * g) + pinnedCal
-			// day_total_cal = sum(all_cal_coeffs * g) + pinnedCal_total
-			// We want: |day_X_cal / day_total_cal - targetPct/100| to be small
-			// Using constant denominator calDenom:
-			// diff = day_X_cal * 100 - day_total_cal_approx * targetPct
-			//      = sum(calCoeff * g) * 100 + pinnedCal * 100 - calDenom * targetPct
-			// But we use calDenom as constant denominator approximation.
-			// diff_expr = sum(calCoeff_i * 100 * g_i) + pinnedCal * 100 - calDenom * targetPct
-			// abs_diff via pos/neg split: diff_expr = pos - neg, abs_val = pos + neg
-
-			// Actually, matching the Python more precisely:
-			// diff_expr = day_X_cal * 100 - day_total_cal * targetPct
-			// But day_total_cal involves all three macros' calories from meal + pinned.
-			// The Python uses: diff_expr = cal_expr * 100 - day_total_cal * target_pct
-			// where day_total_cal = sum over all macros of (meal_macro_cal + pinned_macro_cal)
-			//
-			// To keep this linear and matching the Python's constant-denominator approach:
-			// pct_dev * calDenom * 100 >= abs_diff
-			// where abs_diff is in calorie units * 100 (percentage points * calDenom)
-
-			// Build: sum(calCoeff_i * g_i) * 100 - total_meal_cal * targetPct + pinnedCal * 100 - pinnedTotalCal * targetPct
-			// But total_meal_cal involves all macros too. The Python constructs:
-			// day_X_cal = total_X * cal_factor + pinned_X_cal
-			// day_total_cal = day_carb_cal + day_pro_cal + day_fat_cal
-			// diff = day_X_cal * 100 - day_total_cal * target_pct
-			//
-			// With constant denominator approach, we approximate day_total_cal ~ calDenom:
-			// diff ≈ day_X_cal * 100 - calDenom * target_pct
-			// = (sum(calCoeff * g) + pinnedXCal) * 100 - calDenom * target_pct
-
+			// We want |day_X_cal / day_total_cal - targetPct / 100| small, where
+			// day_X_cal = sum(calCoeff * g) + pinnedXCal. Approximating the day
+			// total by the constant calDenom keeps this linear:
+			// diff = day_X_cal * 100 - calDenom * targetPct = pos - neg
+			// Every term except the gram sum is constant, so the pinned calories
+			// and the denominator fold into the right-hand side once here.
 			const rhs = calDenom * entry.targetPct - entry.pinnedCal * 100;
-			// diff_var = sum(calCoeff * g) * 100 - rhs = pos - neg
-
-			const maxMealCal = ingredients.reduce(
-				(s, ing) => s + ing.max_g * (carbPerG[ing.key] * 4 + proPerG[ing.key] * 4 + fatPerG[ing.key] * 9),
-				0
-			);
-			const bound = (maxMealCal + pinnedCal) * 100;
 
 			// sum(calCoeff_i * 100 * g_i) - pos + neg = rhs
 			const diffTerms: [number, string][] = [
-				...ingredients.map(
-					(ing) =>
-						[entry.calCoeffs[ing.key] * 100, gVar(ing.key)] as [number, string]
-				),
+				...nutrientTerms(entry.perG, entry.kcalPerG * 100),
 				[-1, `macro_${entry.name}_pos`],
 				[1, `macro_${entry.name}_neg`],
 			];
@@ -554,10 +584,7 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 		}
 
 		if (macroDevVars.length > 0) {
-			addBound(0, 'macro_worst', 1);
-			for (const dv of macroDevVars) {
-				constraints.push(` macro_worst_${dv}: macro_worst - ${dv} >= 0`);
-			}
+			addMinimax('macro_worst', macroDevVars, 1);
 			hasMacroWorst = true;
 			maxMacroWorst = 1;
 		}
@@ -569,10 +596,10 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 	let combinedMacroVar: string | null = null;
 
 	const macroPieces: { varName: string; maxVal: number }[] = [];
-	if (hasMacroWorst && maxMacroWorst > 0) {
+	if (hasMacroWorst) {
 		macroPieces.push({ varName: 'macro_worst', maxVal: maxMacroWorst });
 	}
-	if (hasWorstLoose && maxWorstLoose > 0) {
+	if (hasWorstLoose) {
 		macroPieces.push({ varName: 'worst_loose', maxVal: maxWorstLoose });
 	}
 
@@ -582,10 +609,11 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 		hasCombinedMacro = true;
 	} else if (macroPieces.length > 1) {
 		maxCombinedMacro = Math.max(...macroPieces.map((p) => p.maxVal));
-		addBound(0, 'combined_macro', maxCombinedMacro);
-		for (const p of macroPieces) {
-			constraints.push(` combined_macro_${p.varName}: combined_macro - ${p.varName} >= 0`);
-		}
+		addMinimax(
+			'combined_macro',
+			macroPieces.map((p) => p.varName),
+			maxCombinedMacro
+		);
 		combinedMacroVar = 'combined_macro';
 		hasCombinedMacro = true;
 	}
@@ -596,11 +624,9 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 
 	if (priorities.includes(PRIORITY_INGREDIENT_DIVERSITY)) {
 		const maxPossible = Math.max(...ingredients.map((ing) => ing.max_g));
-		addBound(0, 'max_gram', maxPossible);
-		for (const ing of ingredients) {
-			constraints.push(` max_gram_${gVar(ing.key)}: max_gram - ${gVar(ing.key)} >= 0`);
-		}
-		hasDiversity = true;
+		addMinimax('max_gram', gramVars, maxPossible);
+		// All-zero upper bounds leave nothing to spread
+		hasDiversity = maxPossible > 0;
 		maxDiversity = maxPossible;
 	}
 
@@ -609,6 +635,8 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 
 	// Each priority level has one or more terms to minimize in order.
 	// We collect them grouped by level for multi-pass lexicographic solving.
+	// The has* flags are only set once a term exists with a positive bound,
+	// so they alone decide which levels are emitted.
 	type LexTerm = { varName: string; maxVal: number };
 	const lexLevels: LexTerm[][] = [];
 
@@ -618,33 +646,33 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 			// strict priority via multi-pass pinning (no weighted-sum compromise).
 			if (micro_strategy === 'breadth') {
 				// Breadth: minimize total shortfall first, then worst-case
-				if (hasMicroSum && maxMicroPctSum > 0) {
+				if (hasMicroSum) {
 					lexLevels.push([{ varName: 'micro_sum', maxVal: maxMicroPctSum }]);
 				}
-				if (hasWorstPct && maxWorstPct > 0) {
+				if (hasWorstPct) {
 					lexLevels.push([{ varName: 'worst_pct', maxVal: maxWorstPct }]);
 				}
 			} else {
 				// Depth: minimize the worst reachable nutrient (filtered minimax),
 				// then total shortfall as tiebreaker.
-				if (hasDepthWorstPct && maxDepthWorstPct > 0) {
+				if (hasDepthWorstPct) {
 					lexLevels.push([{ varName: 'depth_worst_pct', maxVal: maxDepthWorstPct }]);
 				}
-				if (hasMicroSum && maxMicroPctSum > 0) {
+				if (hasMicroSum) {
 					lexLevels.push([{ varName: 'micro_sum', maxVal: maxMicroPctSum }]);
 				}
 			}
 			// UL proximity is a tiebreaker: avoid being near upper limits,
 			// but only after maximizing DRI coverage
-			if (hasWorstUlProx && maxWorstUlProx > 0) {
+			if (hasWorstUlProx) {
 				lexLevels.push([{ varName: 'worst_ul_prox', maxVal: maxWorstUlProx }]);
 			}
 		} else if (p === PRIORITY_MACRO_RATIO) {
-			if (hasCombinedMacro && combinedMacroVar && maxCombinedMacro > 0) {
+			if (hasCombinedMacro && combinedMacroVar) {
 				lexLevels.push([{ varName: combinedMacroVar, maxVal: maxCombinedMacro }]);
 			}
 		} else if (p === PRIORITY_INGREDIENT_DIVERSITY) {
-			if (hasDiversity && maxDiversity > 0) {
+			if (hasDiversity) {
 				lexLevels.push([{ varName: 'max_gram', maxVal: maxDiversity }]);
 			}
 		} else if (p === PRIORITY_TOTAL_WEIGHT) {
@@ -659,45 +687,34 @@ export function buildLpModel(input: LpModelInput): LpModelComponents {
 
 	// ── Assemble LP components ─────────────────────────────────────
 	// Return structured model for multi-pass lex solving
-	return { ingredients, constraints, bounds, lexLevels };
+	return { ingredients, gramVars, constraints, bounds, lexLevels };
 }
 
 /** Convert model components to a single LP string (for testing/debugging). */
 export function modelToLpString(model: LpModelComponents): string {
 	const allTerms: { varName: string; maxVal: number }[] = model.lexLevels.flat();
 	if (allTerms.length === 0) return '';
-	const objTerms = buildLevelObjective(allTerms, model.ingredients);
-	return assembleLp(model.ingredients, model.constraints, model.bounds, objTerms);
+	const objTerms = buildLevelObjective(allTerms, model.gramVars);
+	return assembleLp(
+		buildExpr(objTerms),
+		model.constraints.join('\n'),
+		model.bounds.join('\n'),
+	);
 }
 
-/** Build an LP string from components with a specific objective. */
-function assembleLp(
-	ingredients: LpModelInput['ingredients'],
-	constraints: string[],
-	bounds: string[],
-	objTerms: [number, string][],
-): string {
-	const lines: string[] = [];
-	lines.push('Minimize');
-	lines.push(` obj: ${buildExpr(objTerms)}`);
-	lines.push('Subject To');
-	for (const c of constraints) {
-		lines.push(c);
-	}
-	lines.push('Bounds');
-	for (const b of bounds) {
-		lines.push(b);
-	}
-	lines.push('End');
-	return lines.join('\n');
+/** Build an LP string from an objective and pre-joined constraint/bound blocks. */
+function assembleLp(objExpr: string, constraintBlock: string, boundBlock: string): string {
+	return `Minimize\n obj: ${objExpr}\nSubject To\n${constraintBlock}\nBounds\n${boundBlock}\nEnd`;
 }
 
 /** Build objective terms for a set of lex terms within one priority level. */
 function buildLevelObjective(
 	level: { varName: string; maxVal: number }[],
-	ingredients: LpModelInput['ingredients'],
+	gramVars: string[],
 ): [number, string][] {
-	// Within a level, use weighted sum for lex dominance:
+	// solveLocal gives every priority tier its own pass, so levels normally
+	// hold a single term and take a unit weight. Only the flattened debug
+	// objective from modelToLpString needs weighted sums for lex dominance:
 	// w[i] = 1 + sum_{j>i} maxVal[j] * w[j]
 	// This guarantees w[i] > total contribution of all lower-priority terms.
 	const weights = new Array(level.length).fill(1);
@@ -713,8 +730,8 @@ function buildLevelObjective(
 	for (let i = 0; i < level.length; i++) {
 		const t = level[i];
 		if (t.varName === '__total_weight__') {
-			for (const ing of ingredients) {
-				terms.push([weights[i], gVar(ing.key)]);
+			for (const g of gramVars) {
+				terms.push([weights[i], g]);
 			}
 		} else {
 			terms.push([weights[i], t.varName]);
@@ -743,18 +760,21 @@ function computeMicroResults(
 	const ulTable = DRI_UL[sex]?.[ageGroup] ?? {};
 	const optimizedSet = new Set(optimizeNutrients);
 
+	// Sum nutrients from solved grams: grams * food.micros[key] / 100, in one
+	// pass over the micros each food actually lists
+	const mealTotals: Record<string, number> = {};
+	for (const si of solvedIngredients) {
+		for (const [key, per100] of Object.entries(foods[si.key].micros)) {
+			mealTotals[key] = (mealTotals[key] ?? 0) + si.grams * per100 / 100;
+		}
+	}
+
 	const micros: Record<string, MicroResult> = {};
 	for (const key of MICRO_KEYS) {
 		const driVal = driTable[key] ?? 0;
 		const pinnedVal = pinnedMicros[key] ?? 0;
 		const remainingVal = Math.max(0, driVal - pinnedVal);
-
-		// Sum nutrient from solved grams: grams * food.micros[key] / 100
-		let mealTotal = 0;
-		for (const si of solvedIngredients) {
-			const food = foods[si.key];
-			mealTotal += si.grams * (food.micros[key] ?? 0) / 100;
-		}
+		const mealTotal = mealTotals[key] ?? 0;
 
 		const pct = driVal > 0 ? (mealTotal + pinnedVal) / driVal * 100 : 0;
 
@@ -772,6 +792,58 @@ function computeMicroResults(
 	return micros;
 }
 
+// ── Feasibility pre-checks ──────────────────────────────────────────
+
+/** Slack for pre-check comparisons so they never reject what HiGHS accepts. */
+const PRECHECK_EPS = 1e-6;
+
+/**
+ * Necessary condition for feasibility: the calorie band must overlap the
+ * range reachable with every ingredient anywhere between its min and max.
+ */
+function calorieBandReachable(input: LpModelInput): boolean {
+	const { ingredients, foods, targets } = input;
+	let minCal = 0;
+	let maxCal = 0;
+	for (const ing of ingredients) {
+		const perG = foods[ing.key].calories_kcal_per_100g / 100;
+		minCal += Math.min(ing.min_g * perG, ing.max_g * perG);
+		maxCal += Math.max(ing.min_g * perG, ing.max_g * perG);
+	}
+	const calLo = targets.meal_calories_kcal - targets.cal_tolerance;
+	const calHi = targets.meal_calories_kcal + targets.cal_tolerance;
+	return maxCal >= calLo - PRECHECK_EPS && minCal <= calHi + PRECHECK_EPS;
+}
+
+const MACRO_FIELD: Record<MacroConstraint['nutrient'], keyof Food> = {
+	carbs: 'carbs_g_per_100g',
+	protein: 'protein_g_per_100g',
+	fat: 'fat_g_per_100g',
+	fiber: 'fiber_g_per_100g',
+};
+
+/**
+ * Same check for hard macro constraints: each gte/lte/eq target must be
+ * reachable within the ingredients' gram ranges.
+ */
+function hardMacrosReachable(input: LpModelInput): boolean {
+	const { ingredients, foods, macro_constraints } = input;
+	for (const mc of macro_constraints ?? []) {
+		if (!mc.hard || mc.mode === 'none') continue;
+		const field = MACRO_FIELD[mc.nutrient];
+		let minSum = 0;
+		let maxSum = 0;
+		for (const ing of ingredients) {
+			const perG = (foods[ing.key][field] as number) / 100;
+			minSum += Math.min(ing.min_g * perG, ing.max_g * perG);
+			maxSum += Math.max(ing.min_g * perG, ing.max_g * perG);
+		}
+		if (mc.mode !== 'lte' && maxSum < mc.grams - PRECHECK_EPS) return false;
+		if (mc.mode !== 'gte' && minSum > mc.grams + PRECHECK_EPS) return false;
+	}
+	return true;
+}
+
 // ── HiGHS solver integration ───────────────────────────────────────
 
 /** Cached HiGHS WASM singleton. */
@@ -803,6 +875,7 @@ export async function solveLocal(input: LpModelInput): Promise<SolveResponse> {
 	const infeasible: SolveResponse = {
 		status: 'infeasible',
 		ingredients: [],
+		total_grams: 0,
 		meal_calories_kcal: 0,
 		meal_protein_g: 0,
 		meal_fat_g: 0,
@@ -814,83 +887,85 @@ export async function solveLocal(input: LpModelInput): Promise<SolveResponse> {
 	// Early exit for empty ingredients
 	if (input.ingredients.length === 0) return infeasible;
 
+	// Out-of-reach calorie bands or hard macro targets skip model building
+	// and every HiGHS pass
+	if (!calorieBandReachable(input) || !hardMacrosReachable(input)) return infeasible;
+
 	const model = buildLpModel(input);
 	const highs = await getHighs();
 
 	// Multi-pass lexicographic solving: for each priority level, solve minimizing
 	// that level's objective, then constrain the optimal value before the next pass.
 	// This guarantees strict priority ordering without numerical weight issues.
-	const { ingredients: modelIngredients, lexLevels } = model;
-	let { constraints, bounds } = model;
-	// Copy so we can add pin constraints without mutating
-	constraints = [...constraints];
+	const { ingredients: modelIngredients, gramVars, lexLevels } = model;
+	// Only the objective and the growing list of pins change between passes,
+	// so the rows and bounds are joined once and each pin is appended as a line.
+	let constraintBlock = model.constraints.join('\n');
+	const boundBlock = model.bounds.join('\n');
 
 	// Relative tolerance: allow each level's objective to worsen by this fraction
 	// of its optimal value when optimizing lower-priority levels.
 	const REL_TOL = input.lex_tolerance ?? 0.04;
 	const ABS_TOL = 1e-4;  // absolute floor for near-zero optima
+	const highsOptions = { ...DEFAULT_HIGHS_OPTIONS, ...input.highs_options };
 
 	let result: ReturnType<typeof highs.solve> | null = null;
 	let pinIdx = 0;
 
-	for (let pass = 0; pass < lexLevels.length; pass++) {
+	const passCount = input.feasibility_only ? 1 : lexLevels.length;
+
+	for (let pass = 0; pass < passCount; pass++) {
 		const level = lexLevels[pass];
-		const objTerms = buildLevelObjective(level, modelIngredients);
-		const lpString = assembleLp(modelIngredients, constraints, bounds, objTerms);
-		result = highs.solve(lpString);
+		const objExpr = buildExpr(buildLevelObjective(level, gramVars));
+		result = highs.solve(assembleLp(objExpr, constraintBlock, boundBlock), highsOptions);
 
 		if (result.Status !== 'Optimal') return infeasible;
 
 		// Skip pinning on the last pass (nothing to protect)
-		if (pass === lexLevels.length - 1) break;
+		if (pass === passCount - 1) break;
 
 		// Pin the objective value: sum(w_i * var_i) <= optimal + tolerance.
 		// This is more robust than pinning individual variables.
 		const optObj = result.ObjectiveValue ?? 0;
 		const tol = Math.max(Math.abs(optObj) * REL_TOL, ABS_TOL);
-		const pinExpr = buildExpr(objTerms);
-		constraints.push(
-			` lex_pin_${pinIdx++}: ${pinExpr} <= ${fmt(optObj + tol)}`
-		);
+		constraintBlock += `\n lex_pin_${pinIdx++}: ${objExpr} <= ${fmt(optObj + tol)}`;
 	}
 
 	if (!result || result.Status !== 'Optimal') return infeasible;
 
 	// Extract gram values from solution columns
 	const solvedIngredients: SolvedIngredient[] = [];
+	let totalGrams = 0;
 	let totalCal = 0;
 	let totalPro = 0;
 	let totalFat = 0;
 	let totalCarb = 0;
 	let totalFiber = 0;
 
-	for (const ing of input.ingredients) {
-		const colName = gVar(ing.key);
-		const col = result.Columns[colName];
-		const grams = col?.Primal ?? 0;
+	for (let i = 0; i < modelIngredients.length; i++) {
+		const ing = modelIngredients[i];
+		const grams = result.Columns[gramVars[i]]?.Primal ?? 0;
 
+		// Food values are per 100 g: scale once, then one multiply per macro
 		const food = input.foods[ing.key];
-		const cal = grams * food.calories_kcal_per_100g / 100;
-		const pro = grams * food.protein_g_per_100g / 100;
-		const fat = grams * food.fat_g_per_100g / 100;
-		const carb = grams * food.carbs_g_per_100g / 100;
-		const fiber = grams * food.fiber_g_per_100g / 100;
-
-		solvedIngredients.push({
+		const hundreds = grams / 100;
+		const si: SolvedIngredient = {
 			key: ing.key,
 			grams,
-			calories_kcal: cal,
-			protein_g: pro,
-			fat_g: fat,
-			carbs_g: carb,
-			fiber_g: fiber,
-		});
-
-		totalCal += cal;
-		totalPro += pro;
-		totalFat += fat;
-		totalCarb += carb;
-		totalFiber += fiber;
+			calories_kcal: hundreds * food.calories_kcal_per_100g,
+			protein_g: hundreds * food.protein_g_per_100g,
+			fat_g: hundreds * food.fat_g_per_100g,
+			carbs_g: hundreds * food.carbs_g_per_100g,
+			fiber_g: hundreds * food.fiber_g_per_100g,
+		};
+		solvedIngredients.push(si);
+
+		totalGrams += grams;
+		totalCal += si.calories_kcal;
+		totalPro += si.protein_g;
+		totalFat += si.fat_g;
+		totalCarb += si.carbs_g;
+		totalFiber += si.fiber_g;
 	}
 
 	// Compute micro results for all 20 tracked nutrients
@@ -909,8 +984,9 @@ export async function solveLocal(input: LpModelInput): Promise<SolveResponse> {
 	);
 
 	return {
-		status: 'optimal',
+		status: input.feasibility_only ? 'feasible' : 'optimal',
 		ingredients: solvedIngredients,
+		total_grams: totalGrams,
 		meal_calories_kcal: totalCal,
 		meal_protein_g: totalPro,
 		meal_fat_g: totalFat,
@@ -1,6 +1,6 @@
 # /// script
 # requires-python = ">=3.11"
-# dependencies = ["rich"]
+# dependencies = ["orjson", "rich"]
 # ///
 """Build the unified food database from USDA FoodData Central exports.
 
@@ -20,12 +20,15 @@ from __future__ import annotations
 
 import argparse
 import json
+import pickle
 import re
 import subprocess
 import threading
+from collections.abc import Callable
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+import orjson
 from rich.console import Console
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn, TimeRemainingColumn, MofNCompleteColumn
 
@@ -40,6 +43,7 @@ NAME_CACHE_PATH = Path(__file__).resolve().parent.parent / "src" / "daily_chow"
 COMMONNESS_CACHE_PATH = Path(__file__).resolve().parent.parent / "src" / "daily_chow" / "data" / "commonness_cache.json"
 GROUP_CACHE_PATH = Path(__file__).resolve().parent.parent / "src" / "daily_chow" / "data" / "group_cache.json"
 PORTION_CACHE_PATH = Path(__file__).resolve().parent.parent / "src" / "daily_chow" / "data" / "portion_cache.json"
+PARSE_CACHE_DIR = Path.home() / ".cache" / "daily-chow"
 
 # -- Nutrient IDs to keep --------------------------------------------------
 KEEP_NUTRIENT_IDS: set[int] = {
@@ -165,8 +169,7 @@ def _parse_food(food: dict) -> dict:
 def load_foundation(path: Path) -> dict[int, dict]:
     """Load Foundation Foods, keyed by NDB number."""
     print(f"Reading Foundation Foods: {path}  ({path.stat().st_size / 1_048_576:.1f} MB)")
-    with open(path) as f:
-        raw = json.load(f)
+    raw = orjson.loads(path.read_bytes())
 
     foods: dict[int, dict] = {}
     for food in raw["FoundationFoods"]:
@@ -185,8 +188,7 @@ def load_foundation(path: Path) -> dict[int, dict]:
 def load_sr_legacy(path: Path) -> dict[int, dict]:
     """Load SR Legacy Foods, keyed by NDB number."""
     print(f"Reading SR Legacy: {path}  ({path.stat().st_size / 1_048_576:.1f} MB)")
-    with open(path) as f:
-        raw = json.load(f)
+    raw = orjson.loads(path.read_bytes())
 
     foods: dict[int, dict] = {}
     for food in raw["SRLegacyFoods"]:
@@ -201,6 +203,29 @@ def load_sr_legacy(path: Path) -> dict[int, dict]:
     return foods
 
 
+def load_cached(path: Path, loader: Callable[[Path], dict[int, dict]]) -> dict[int, dict]:
+    """Run loader(path), reusing a pickled result while the export and this script are unchanged."""
+    src = path.stat()
+    key = (src.st_mtime_ns, src.st_size, Path(__file__).stat().st_mtime_ns)
+    cache_path = PARSE_CACHE_DIR / f"{path.stem}.pkl"
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, foods = pickle.load(f)
+        if cached_key == key:
+            print(f"Using parsed cache: {cache_path}  ({len(foods)} foods)")
+            return foods
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    foods = loader(path)
+    PARSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_suffix(".pkl.tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump((key, foods), f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(cache_path)
+    return foods
+
+
 def _backfill_nutrients(foundation_food: dict, sr_food: dict) -> int:
     """Copy missing nutrients from SR Legacy into a Foundation food entry.
 
@@ -263,6 +288,18 @@ def merge_foods(foundation: dict[int, dict], sr_legacy: dict[int, dict]) -> dict
     return merged
 
 
+def _write_json_atomic(path: Path, data: object, **dump_kwargs) -> None:
+    """Write JSON to a sibling temp file and rename it over path.
+
+    An interrupted build (Ctrl-C during a long Haiku run) leaves the previous
+    cache intact instead of a truncated file that fails to load next time.
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, **dump_kwargs)
+    tmp.replace(path)
+
+
 def _call_haiku(prompt: str) -> str:
     """Call Claude Haiku via Claude Code headless mode."""
     import os
@@ -405,8 +442,7 @@ Input (fdc_id|description):
 
             processed += len(batch)
             if processed % (batch_size * 50) == 0 or processed == len(needs_names):
-                with open(cache_path, "w") as f:
-                    json.dump(cache, f, indent=2)
+                _write_json_atomic(cache_path, cache, indent=2)
 
     console.print(f"  Running [bold]{len(batches)}[/bold] batches with [bold]{max_workers}[/bold] parallel workers")
     with Progress(
@@ -423,8 +459,7 @@ Input (fdc_id|description):
             for future in as_completed(futures):
                 future.result()
 
-    with open(cache_path, "w") as f:
-        json.dump(cache, f, indent=2)
+    _write_json_atomic(cache_path, cache, indent=2)
 
     if errors:
         console.print(f"  [yellow]⚠ {errors} batches fell back to raw description[/yellow]")
@@ -536,8 +571,7 @@ Output a JSON object mapping each fdc_id to its integer score, nothing else: {{"
 
             processed += len(batch)
             if processed % (batch_size * 50) == 0 or processed == len(needs_scores):
-                with open(cache_path, "w") as f:
-                    json.dump(cache, f, indent=2)
+                _write_json_atomic(cache_path, cache, indent=2)
 
     console.print(f"  Running [bold]{len(batches)}[/bold] batches with [bold]{max_workers}[/bold] parallel workers")
     with Progress(
@@ -554,8 +588,7 @@ Output a JSON object mapping each fdc_id to its integer score, nothing else: {{"
             for future in as_completed(futures):
                 future.result()
 
-    with open(cache_path, "w") as f:
-        json.dump(cache, f, indent=2)
+    _write_json_atomic(cache_path, cache, indent=2)
 
     if errors:
         console.print(f"  [yellow]⚠ {errors} batches fell back to score 3[/yellow]")
@@ -716,8 +749,7 @@ Output ONLY a JSON object mapping each fdc_id to its group name string: {{"fdc_i
 
             # Save cache every 50 batches
             if processed % (batch_size * 50) == 0 or processed == len(needs_groups):
-                with open(cache_path, "w") as f:
-                    json.dump(cache, f, indent=2)
+                _write_json_atomic(cache_path, cache, indent=2)
 
     console.print(f"  Running [bold]{total_batches}[/bold] batches with [bold]{max_workers}[/bold] parallel workers")
     with Progress(
@@ -738,8 +770,7 @@ Output ONLY a JSON object mapping each fdc_id to its group name string: {{"fdc_i
                 future.result()  # propagate exceptions
 
     # Final save
-    with open(cache_path, "w") as f:
-        json.dump(cache, f, indent=2)
+    _write_json_atomic(cache_path, cache, indent=2)
 
     if errors:
         console.print(f"  [yellow]⚠ {errors} batches fell back to food name[/yellow]")
@@ -890,8 +921,7 @@ Input (fdc_id|name|usda_description|portions):
 
             processed += len(batch)
             if processed % (batch_size * 50) == 0 or processed == len(needs_portions):
-                with open(cache_path, "w") as f:
-                    json.dump(cache, f, indent=2)
+                _write_json_atomic(cache_path, cache, indent=2)
 
     console.print(f"  Running [bold]{len(batches)}[/bold] batches with [bold]{max_workers}[/bold] parallel workers")
     with Progress(
@@ -908,8 +938,7 @@ Input (fdc_id|name|usda_description|portions):
             for future in as_completed(futures):
                 future.result()
 
-    with open(cache_path, "w") as f:
-        json.dump(cache, f, indent=2)
+    _write_json_atomic(cache_path, cache, indent=2)
 
     has_portion = sum(1 for v in cache.values() if v is not None)
     if errors:
@@ -956,8 +985,8 @@ def main() -> None:
     parser.add_argument("--skip-portions", action="store_true", help="Skip Haiku portion generation")
     args = parser.parse_args()
 
-    foundation = load_foundation(FOUNDATION_PATH)
-    sr_legacy = load_sr_legacy(SR_LEGACY_PATH)
+    foundation = load_cached(FOUNDATION_PATH, load_foundation)
+    sr_legacy = load_cached(SR_LEGACY_PATH, load_sr_legacy)
     merged = merge_foods(foundation, sr_legacy)
 
     names = generate_names(merged, NAME_CACHE_PATH, skip=args.skip_names)
@@ -968,8 +997,7 @@ def main() -> None:
     output = build_output(merged, names, commonness, groups, portions)
 
     OUTPUT.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT, "w") as f:
-        json.dump(output, f, separators=(",", ":"))
+    _write_json_atomic(OUTPUT, output, separators=(",", ":"))
 
     file_size = OUTPUT.stat().st_size
     total_nutrients = sum(len(f["nutrients"]) for f in output)